@@ -0,0 +1,47 @@
+"""
+Process-wide cache for config.json reads.
+
+Orchestration scripts (and drivers that import several of them) re-read the
+same config file repeatedly; parse it once per path instead, and invalidate
+the cache whenever the file is rewritten through save_config.
+"""
+import json
+import os
+from functools import lru_cache
+
+try:
+    import orjson
+except ImportError:  # optional accelerator; stdlib json is the fallback
+    orjson = None
+
+
+@lru_cache(maxsize=8)
+def _load(path):
+    with open(path, 'rb') as f:
+        data = f.read()
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def load_config(config_file):
+    """Load configuration from a JSON file, cached per absolute path."""
+    return _load(os.path.abspath(config_file))
+
+
+def save_config(config_file, config, indent=2):
+    """Write configuration atomically (tempfile + os.replace) and invalidate the read cache."""
+    path = os.path.abspath(config_file)
+    tmp = f"{path}.tmp"
+    blob = json.dumps(config, indent=indent)
+    try:
+        with open(tmp, 'w') as f:
+            f.write(blob)
+        os.replace(tmp, path)
+    except OSError:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+    _load.cache_clear()
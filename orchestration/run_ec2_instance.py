@@ -3,9 +3,11 @@
 Simple test script to launch EC2 instance and run Docker container.
 """
 import argparse
+import functools
 import json
 import boto3
 import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any
 import os
 from jinja2 import Template
@@ -20,11 +22,17 @@ def load_config(config_file):
         return json.load(f)
 
 
-def render_user_data_jinja(config, input_bucket=None, output_bucket=None, log_stream=None, output_key=None, input_prefix=None):
-    """Render user data from Jinja2 template file."""
+@functools.lru_cache(maxsize=1)
+def _load_template():
+    """Read and compile the user data template once per process."""
     template_path = os.path.join(os.path.dirname(__file__), 'user_data_template.sh.j2')
     with open(template_path) as f:
-        template = Template(f.read())
+        return Template(f.read())
+
+
+def render_user_data_jinja(config, input_bucket=None, output_bucket=None, log_stream=None, output_key=None, input_prefix=None):
+    """Render user data from Jinja2 template file."""
+    template = _load_template()
     # Prepare variables
     variables = {
         'AWS_REGION': config['environment']['region'],
@@ -63,20 +71,32 @@ def generate_user_data(config, input_bucket=None, output_bucket=None, log_stream
 
 
 def assume_role(role_arn, session_name, base_profile=None, region=None):
-    """Assume the given role and return a boto3.Session using the temporary credentials."""
+    """Assume the given role and return a boto3.Session with auto-refreshing credentials."""
     base_session = boto3.Session(profile_name=base_profile, region_name=region) if base_profile else boto3.Session(region_name=region)
     sts = base_session.client('sts')
-    response = sts.assume_role(
-        RoleArn=role_arn,
-        RoleSessionName=session_name
-    )
-    creds = response['Credentials']
-    return boto3.Session(
-        aws_access_key_id=creds['AccessKeyId'],
-        aws_secret_access_key=creds['SecretAccessKey'],
-        aws_session_token=creds['SessionToken'],
-        region_name=region
+
+    def refresh():
+        response = sts.assume_role(
+            RoleArn=role_arn,
+            RoleSessionName=session_name
+        )
+        creds = response['Credentials']
+        return {
+            'access_key': creds['AccessKeyId'],
+            'secret_key': creds['SecretAccessKey'],
+            'token': creds['SessionToken'],
+            'expiry_time': creds['Expiration'].isoformat(),
+        }
+
+    credentials = RefreshableCredentials.create_from_metadata(
+        metadata=refresh(),
+        refresh_using=refresh,
+        method='sts-assume-role'
     )
+    botocore_session = get_session()
+    botocore_session._credentials = credentials
+    botocore_session.set_config_variable('region', region)
+    return boto3.Session(botocore_session=botocore_session)
 
 
 def get_existing_instance(instance_id, region, session):
@@ -159,36 +179,40 @@ def run_userdata_on_instance(config, instance_id, input_bucket=None, output_buck
     
     # Generate user data script
     user_data = generate_user_data(config, input_bucket=input_bucket, output_bucket=output_bucket, log_stream=log_stream, output_key=output_key, input_prefix=input_prefix)
-    
-    # Remove the shebang and make it executable
-    user_data_script = user_data.replace('#!/bin/bash\n', '')
-    
-    # Create a temporary script file on the instance
+
+    # Stage the rendered script in S3 and have the instance fetch it, instead
+    # of embedding it as an SSM heredoc: the command payload drops to a couple
+    # hundred bytes and stays clear of the 60 KB SSM parameters ceiling.
+    import uuid
+    bucket = output_bucket or config['environment']['output_bucket']
+    script_key = f"bootstrap/rerun_userdata_{uuid.uuid4().hex}.sh"
+
     setup_commands = [
         '#!/bin/bash',
         'set -e',
         'echo "=== Re-running user data script ==="',
         'echo "Timestamp: $(date)"',
         '',
-        '# Create temporary script file',
-        'cat > /tmp/rerun_userdata.sh << \'EOF\'',
-        user_data_script,
-        'EOF',
-        '',
-        '# Make it executable and run it',
+        '# Fetch the staged script, run it, and clean up. The S3 delete is',
+        '# best-effort: under set -e, a role without s3:DeleteObject would',
+        '# otherwise fail the whole command after the script already ran.',
+        f'aws s3 cp s3://{bucket}/{script_key} /tmp/rerun_userdata.sh',
         'chmod +x /tmp/rerun_userdata.sh',
         'echo "=== Executing user data script ==="',
         '/tmp/rerun_userdata.sh',
-        '',
-        '# Clean up',
         'rm -f /tmp/rerun_userdata.sh',
+        f'aws s3 rm s3://{bucket}/{script_key} || echo "[WARN] Could not delete staged script (missing s3:DeleteObject?)"',
         'echo "=== User data script completed ==="'
     ]
-    
-    # Run commands via SSM
+
+    # Upload the script, then run the fetch-and-execute commands via SSM
     try:
+        s3 = session.client('s3')
+        s3.put_object(Bucket=bucket, Key=script_key, Body=user_data.encode('utf-8'))
+        print(f"[INFO] Uploaded user data script to s3://{bucket}/{script_key}")
+
         ssm = session.client('ssm')
-        
+
         print(f"[INFO] Sending user data script to instance {instance_id}...")
         response = ssm.send_command(
             InstanceIds=[instance_id],
@@ -208,25 +232,18 @@ def run_userdata_on_instance(config, instance_id, input_bucket=None, output_buck
         return None, None
 
 
-def run_job_on_instance(config, instance_id, input_bucket=None, output_bucket=None, session=None, log_stream=None, output_key=None, input_prefix=None):
-    """Run the batch processing job on an existing instance using SSM."""
-    if session is None:
-        raise ValueError("AWS session is not initialized.")
+# SSM send_command accepts at most this many instance IDs per call.
+SSM_MAX_INSTANCES_PER_COMMAND = 50
+
+
+def _build_docker_command(config, input_bucket, output_bucket, log_stream, output_key, input_prefix):
+    """Build the docker run command used for SSM job execution."""
     region = config['environment']['region']
-    instance_id, public_dns = get_existing_instance(instance_id, region, session)
-    if not instance_id:
-        return None, None
-    
-    print(f"[INFO] Running job on existing instance {instance_id}")
-    
-    # Generate the Docker run command
     docker_image = config['docker']['image']
     input_prefix = input_prefix or config['environment']['input_prefix']
     log_group = config['cloudwatch']['log_group']
 
-    
-    # Build Docker command
-    docker_cmd = f'''docker run --rm \
+    return f'''docker run --rm \
     -e AWS_REGION={region} \
     -e INPUT_BUCKET={input_bucket} \
     -e OUTPUT_BUCKET={output_bucket} \
@@ -241,7 +258,22 @@ def run_job_on_instance(config, instance_id, input_bucket=None, output_bucket=No
     --output-key {output_key} \
     --log-group {log_group} \
     --log-stream {log_stream}'''
-    
+
+
+def run_job_on_instance(config, instance_id, input_bucket=None, output_bucket=None, session=None, log_stream=None, output_key=None, input_prefix=None):
+    """Run the batch processing job on an existing instance using SSM."""
+    if session is None:
+        raise ValueError("AWS session is not initialized.")
+    region = config['environment']['region']
+    instance_id, public_dns = get_existing_instance(instance_id, region, session)
+    if not instance_id:
+        return None, None
+
+    print(f"[INFO] Running job on existing instance {instance_id}")
+
+    # Generate the Docker run command
+    docker_cmd = _build_docker_command(config, input_bucket, output_bucket, log_stream, output_key, input_prefix)
+
     # Run command via SSM
     try:
         ssm = session.client('ssm')
@@ -265,6 +297,54 @@ def run_job_on_instance(config, instance_id, input_bucket=None, output_bucket=No
         return None, None
 
 
+def run_job_on_instances(config, instance_ids, input_bucket=None, output_bucket=None, session=None, log_stream=None, output_key=None, input_prefix=None):
+    """Run the batch processing job on multiple existing instances using SSM.
+
+    One send_command call covers up to 50 instances; larger fleets are chunked
+    and the chunks submitted in parallel, instead of one call per instance.
+    Returns the list of SSM command IDs (empty on failure).
+    """
+    if session is None:
+        raise ValueError("AWS session is not initialized.")
+    if not instance_ids:
+        return []
+
+    print(f"[INFO] Running job on {len(instance_ids)} existing instances")
+
+    docker_cmd = _build_docker_command(config, input_bucket, output_bucket, log_stream, output_key, input_prefix)
+    ssm = session.client('ssm')
+
+    chunks = [
+        instance_ids[i:i + SSM_MAX_INSTANCES_PER_COMMAND]
+        for i in range(0, len(instance_ids), SSM_MAX_INSTANCES_PER_COMMAND)
+    ]
+
+    def send_chunk(chunk):
+        response = ssm.send_command(
+            InstanceIds=chunk,
+            DocumentName="AWS-RunShellScript",
+            Parameters={'commands': [docker_cmd]}
+        )
+        return response['Command']['CommandId']
+
+    try:
+        if len(chunks) == 1:
+            command_ids = [send_chunk(chunks[0])]
+        else:
+            with ThreadPoolExecutor(max_workers=8) as executor:
+                command_ids = list(executor.map(send_chunk, chunks))
+
+        for command_id in command_ids:
+            print(f"[INFO] Command sent with ID: {command_id}")
+        print(f"[INFO] You can monitor logs with: python view_logs.py --log-stream {log_stream}")
+        return command_ids
+
+    except Exception as e:
+        print(f"[ERROR] Failed to run command on instances: {e}")
+        print("[INFO] Make sure the instances have SSM agent installed and proper IAM permissions")
+        return []
+
+
 def print_log_group_info(config, log_stream=None):
     log_group = config['cloudwatch']['log_group']
     region = config['environment']['region']
@@ -5,17 +5,80 @@ Script to create/update the automation role for launching EC2 with correct PassR
 import boto3
 import argparse
 import json
+from botocore.config import Config
+
+from _config_cache import load_config as _load_cached_config, save_config
+
+# Shared client config: adaptive retries plus a pooled connection set reused
+# by every client this script creates.
+CLIENT_CONFIG = Config(retries={'mode': 'adaptive', 'max_attempts': 10}, max_pool_connections=20)
+
+# Trust policy template, pre-serialized at import time; only the account ID
+# is substituted at call time.
+_TRUST_POLICY_TEMPLATE = json.dumps({
+    "Version": "2012-10-17",
+    "Statement": [{
+        "Effect": "Allow",
+        "Principal": {"AWS": "arn:aws:iam::__ACCOUNT_ID__:root"},
+        "Action": "sts:AssumeRole"
+    }]
+}, separators=(',', ':'))
+
+# Automation policy template: EC2, S3, CloudWatch, and PassRole for the
+# instance profile role. Serialized once at import; only the PassRole
+# resource ARN is substituted per call.
+_AUTOMATION_POLICY_TEMPLATE = json.dumps({
+    "Version": "2012-10-17",
+    "Statement": [
+        {
+            "Effect": "Allow",
+            "Action": [
+                "ec2:RunInstances",
+                "ec2:DescribeInstances",
+                "ec2:TerminateInstances",
+                "ec2:DescribeInstanceStatus",
+                "ec2:CreateTags",
+                "ec2:DescribeImages"
+            ],
+            "Resource": "*"
+        },
+        {
+            "Effect": "Allow",
+            "Action": [
+                "iam:PassRole"
+            ],
+            "Resource": "__PASS_ROLE_ARN__"
+        },
+        {
+            "Effect": "Allow",
+            "Action": [
+                "s3:ListBucket",
+                "s3:GetObject",
+                "s3:PutObject"
+            ],
+            "Resource": "*"
+        },
+        {
+            "Effect": "Allow",
+            "Action": [
+                "logs:CreateLogGroup",
+                "logs:CreateLogStream",
+                "logs:PutLogEvents"
+            ],
+            "Resource": "*"
+        }
+    ]
+}, separators=(',', ':'))
+
 
 def update_config_file(config_file, automation_role_arn):
     """Update config.json with the automation_role_arn."""
     try:
-        with open(config_file, 'r') as f:
-            config = json.load(f)
+        config = _load_cached_config(config_file)
         if 'iam' not in config:
             config['iam'] = {}
         config['iam']['automation_role_arn'] = automation_role_arn
-        with open(config_file, 'w') as f:
-            json.dump(config, f, indent=2)
+        save_config(config_file, config)
         print(f"✅ Updated {config_file} with automation_role_arn: {automation_role_arn}")
         return True
     except Exception as e:
@@ -25,76 +88,27 @@ def update_config_file(config_file, automation_role_arn):
 
 def create_or_update_automation_role(role_name, instance_profile_role_arn, profile=None, config_file=None, update_config=False):
     session = boto3.Session(profile_name=profile)
-    iam = session.client('iam')
-    sts = session.client('sts')
+    iam = session.client('iam', config=CLIENT_CONFIG)
+    sts = session.client('sts', config=CLIENT_CONFIG)
     account_id = sts.get_caller_identity()['Account']
 
-    trust_policy = {
-        "Version": "2012-10-17",
-        "Statement": [{
-            "Effect": "Allow",
-            "Principal": {"AWS": f"arn:aws:iam::{account_id}:root"},
-            "Action": "sts:AssumeRole"
-        }]
-    }
-
-    # Policy: EC2, S3, CloudWatch, and PassRole for the instance profile role
-    automation_policy = {
-        "Version": "2012-10-17",
-        "Statement": [
-            {
-                "Effect": "Allow",
-                "Action": [
-                    "ec2:RunInstances",
-                    "ec2:DescribeInstances",
-                    "ec2:TerminateInstances",
-                    "ec2:DescribeInstanceStatus",
-                    "ec2:CreateTags",
-                    "ec2:DescribeImages"
-                ],
-                "Resource": "*"
-            },
-            {
-                "Effect": "Allow",
-                "Action": [
-                    "iam:PassRole"
-                ],
-                "Resource": instance_profile_role_arn
-            },
-            {
-                "Effect": "Allow",
-                "Action": [
-                    "s3:ListBucket",
-                    "s3:GetObject",
-                    "s3:PutObject"
-                ],
-                "Resource": "*"
-            },
-            {
-                "Effect": "Allow",
-                "Action": [
-                    "logs:CreateLogGroup",
-                    "logs:CreateLogStream",
-                    "logs:PutLogEvents"
-                ],
-                "Resource": "*"
-            }
-        ]
-    }
+    trust_policy_json = _TRUST_POLICY_TEMPLATE.replace('__ACCOUNT_ID__', account_id)
+    policy_doc = _AUTOMATION_POLICY_TEMPLATE.replace('__PASS_ROLE_ARN__', instance_profile_role_arn)
 
     try:
+        # Try the update path directly; the common re-run case then costs one
+        # API call instead of a get_role probe plus the update.
         try:
-            iam.get_role(RoleName=role_name)
-            print(f"[INFO] Role {role_name} already exists, updating trust policy and attaching policy.")
             iam.update_assume_role_policy(
                 RoleName=role_name,
-                PolicyDocument=json.dumps(trust_policy)
+                PolicyDocument=trust_policy_json
             )
+            print(f"[INFO] Role {role_name} already exists, updated trust policy and attaching policy.")
         except iam.exceptions.NoSuchEntityException:
             print(f"[INFO] Creating role {role_name}")
             iam.create_role(
                 RoleName=role_name,
-                AssumeRolePolicyDocument=json.dumps(trust_policy),
+                AssumeRolePolicyDocument=trust_policy_json,
                 Description="Automation role for launching EC2 with PassRole"
             )
 
@@ -103,7 +117,7 @@ def create_or_update_automation_role(role_name, instance_profile_role_arn, profi
         iam.put_role_policy(
             RoleName=role_name,
             PolicyName=policy_name,
-            PolicyDocument=json.dumps(automation_policy)
+            PolicyDocument=policy_doc
         )
         print(f"\n[SUCCESS] Automation role {role_name} is ready.")
         automation_role_arn = f"arn:aws:iam::{account_id}:role/{role_name}"
@@ -0,0 +1,149 @@
+"""
+Shared assume-role helper for the utility scripts.
+
+Temporary STS credentials are cached on disk per (role_arn, base_profile,
+region), so repeated script invocations reuse them instead of paying an STS
+round-trip every run.
+"""
+import boto3
+import fcntl
+import functools
+import hashlib
+import json
+import os
+from botocore.config import Config
+from botocore.credentials import RefreshableCredentials
+from botocore.session import get_session as _get_botocore_session
+from datetime import datetime, timedelta, timezone
+
+CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'eb_aws')
+# Refresh when the cached credentials have less than this much life left.
+EXPIRY_MARGIN = timedelta(minutes=5)
+SESSION_DURATION_SECONDS = 3600
+
+
+def _cache_path(role_arn, base_profile, region):
+    digest = hashlib.sha256(f"{role_arn}|{base_profile}|{region}".encode()).hexdigest()[:16]
+    return os.path.join(CACHE_DIR, f"sts_{digest}.json")
+
+
+def _read_cached_credentials(cache_file):
+    """Return cached credentials if they are still comfortably valid."""
+    try:
+        with open(cache_file, 'r') as f:
+            creds = json.load(f)
+        expiration = datetime.fromisoformat(creds['Expiration'])
+        if expiration - datetime.now(timezone.utc) > EXPIRY_MARGIN:
+            return creds
+    except (OSError, ValueError, KeyError):
+        pass
+    return None
+
+
+def _write_cached_credentials(cache_file, creds):
+    """Atomically write credentials, locked against concurrent orchestrator runs.
+
+    The file holds live STS credentials, so it is created 0600 in a 0700
+    directory (as the AWS CLI does for its credential cache) rather than
+    with umask-default permissions.
+    """
+    os.makedirs(CACHE_DIR, mode=0o700, exist_ok=True)
+    os.chmod(CACHE_DIR, 0o700)  # mode= only applies when the dir is created
+    tmp = f"{cache_file}.tmp"
+    try:
+        with open(os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), 'w') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            json.dump(creds, f)
+        os.replace(tmp, cache_file)
+    except OSError:
+        # Caching is best-effort; the fresh credentials are still usable.
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+
+
+def _fetch_credentials(role_arn, session_name, base_profile, region):
+    """Call STS AssumeRole and return the credentials as a JSON-friendly dict."""
+    base_session = boto3.Session(profile_name=base_profile, region_name=region) if base_profile else boto3.Session(region_name=region)
+    # Regional STS endpoints have separate throttle buckets and lower latency
+    # than the global sts.amazonaws.com default.
+    if region:
+        sts = base_session.client('sts', region_name=region,
+                                  endpoint_url=f'https://sts.{region}.amazonaws.com')
+    else:
+        sts = base_session.client('sts')
+    response = sts.assume_role(
+        RoleArn=role_arn,
+        RoleSessionName=session_name,
+        DurationSeconds=SESSION_DURATION_SECONDS
+    )
+    creds = response['Credentials']
+    return {
+        'AccessKeyId': creds['AccessKeyId'],
+        'SecretAccessKey': creds['SecretAccessKey'],
+        'SessionToken': creds['SessionToken'],
+        'Expiration': creds['Expiration'].isoformat(),
+    }
+
+
+def cached_assume_role(role_arn, session_name, base_profile=None, region=None):
+    """Assume the given role and return a boto3.Session that auto-refreshes.
+
+    Credentials are renewed by botocore before expiry, so long-running scripts
+    (e.g. --wait with a multi-hour timeout) don't start failing after the
+    one-hour STS lifetime. The refresh path consults the on-disk cache first,
+    so a fresh STS call happens only when no cached credentials remain valid.
+    """
+    cache_file = _cache_path(role_arn, base_profile, region)
+
+    def refresh():
+        creds = _read_cached_credentials(cache_file)
+        if creds is None:
+            creds = _fetch_credentials(role_arn, session_name, base_profile, region)
+            _write_cached_credentials(cache_file, creds)
+        return {
+            'access_key': creds['AccessKeyId'],
+            'secret_key': creds['SecretAccessKey'],
+            'token': creds['SessionToken'],
+            'expiry_time': creds['Expiration'],
+        }
+
+    credentials = RefreshableCredentials.create_from_metadata(
+        metadata=refresh(),
+        refresh_using=refresh,
+        method='sts-assume-role'
+    )
+    botocore_session = _get_botocore_session()
+    botocore_session._credentials = credentials
+    botocore_session.set_config_variable('region', region)
+    return boto3.Session(botocore_session=botocore_session)
+
+
+@functools.lru_cache(maxsize=8)
+def get_session(role_arn, region=None, base_profile=None):
+    """Memoized cached_assume_role, keyed on (role_arn, region, base_profile).
+
+    The returned Session carries RefreshableCredentials, so it stays valid
+    across its lifetime and can safely be shared by every script in a process
+    (e.g. the in-process test runner). The session name only has to be unique
+    per process, not per call.
+    """
+    session_name = f"automation-session-{os.getpid()}"
+    return cached_assume_role(role_arn, session_name, base_profile, region)
+
+
+# CloudWatch Logs is aggressively rate-limited; adaptive retries back off
+# against server throttle responses and the larger pool supports the
+# concurrent per-stream fetches in view_logs.
+LOGS_CLIENT_CONFIG = Config(
+    retries={'max_attempts': 10, 'mode': 'adaptive'},
+    max_pool_connections=50,
+    tcp_keepalive=True,
+)
+
+
+@functools.lru_cache(maxsize=8)
+def get_logs_client(role_arn, region=None, base_profile=None):
+    """Cached CloudWatch Logs client on the memoized assume-role session."""
+    return get_session(role_arn, region, base_profile).client('logs', config=LOGS_CLIENT_CONFIG)
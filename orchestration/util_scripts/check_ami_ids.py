@@ -1,23 +1,63 @@
 import boto3
+import json
+import os
+import time
+from datetime import datetime, timedelta
+from operator import itemgetter
 
 region = 'eu-north-1'  # Change to your preferred region
-ssm = boto3.client('ssm', region_name=region)
 
-# Get the latest Amazon Linux 2 AMI ID
-param = "/aws/service/ami-amazon-linux-latest/al2023-ami-kernel-6.1-x86_64"
-ami_id = ssm.get_parameter(Name=param)['Parameter']['Value']
+CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'eb_aws')
+# AMI releases happen at most daily, so a day-old answer is still current.
+CACHE_TTL_SECONDS = 24 * 3600
 
+
+def _cached(key, ttl, fn):
+    """Return the cached JSON value for key, refreshing via fn() when stale."""
+    cache_file = os.path.join(CACHE_DIR, f"ami_{key}.json")
+    try:
+        if time.time() - os.path.getmtime(cache_file) < ttl:
+            with open(cache_file, 'r') as f:
+                return json.load(f)
+    except (OSError, ValueError):
+        pass
+    value = fn()
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    tmp = f"{cache_file}.tmp"
+    with open(tmp, 'w') as f:
+        json.dump(value, f)
+    os.replace(tmp, cache_file)
+    return value
+
+
+def _get_al2023_ami():
+    """Get the latest Amazon Linux 2023 AMI ID from the public SSM parameter."""
+    ssm = boto3.client('ssm', region_name=region)
+    param = "/aws/service/ami-amazon-linux-latest/al2023-ami-kernel-6.1-x86_64"
+    return ssm.get_parameter(Name=param)['Parameter']['Value']
+
+
+def _get_latest_dlami():
+    """Find the latest TensorFlow DLAMI with NVIDIA GPU support."""
+    filters = [
+        {'Name': 'name', 'Values': ['Deep Learning AMI GPU TensorFlow*']},
+        {'Name': 'state', 'Values': ['available']},
+        {'Name': 'architecture', 'Values': ['x86_64']}
+    ]
+    ec2 = boto3.client('ec2', region_name=region)
+    # Restrict to the last few months server-side so the response stays small;
+    # fall back to the unrestricted query if nothing recent matches.
+    now = datetime.utcnow()
+    months = sorted({(now - timedelta(days=30 * i)).strftime('%Y-%m') for i in range(3)})
+    date_filter = {'Name': 'creation-date', 'Values': [f'{month}-*' for month in months]}
+    response = ec2.describe_images(Owners=['amazon'], Filters=filters + [date_filter])
+    if not response['Images']:
+        response = ec2.describe_images(Owners=['amazon'], Filters=filters)
+    return max(response['Images'], key=itemgetter('CreationDate'))['ImageId']
+
+
+ami_id = _cached(f"al2023_{region}", CACHE_TTL_SECONDS, _get_al2023_ami)
 print(f"Latest Amazon Linux 2023 AMI ID: {ami_id}")
 
-# Find the latest TensorFlow DLAMI with NVIDIA GPU support
-filters = [
-    {'Name': 'name', 'Values': ['Deep Learning AMI GPU TensorFlow*']},
-    {'Name': 'state', 'Values': ['available']},
-    {'Name': 'architecture', 'Values': ['x86_64']}
-]
-ec2 = boto3.client('ec2', region_name=region)
-response = ec2.describe_images(Owners=['amazon'], Filters=filters)
-images = sorted(response['Images'], key=lambda x: x['CreationDate'], reverse=True)
-latest_dlami_id = images[0]['ImageId']
-
-print(f"Latest TensorFlow DLAMI ID: {latest_dlami_id}")
\ No newline at end of file
+latest_dlami_id = _cached(f"dlami_{region}", CACHE_TTL_SECONDS, _get_latest_dlami)
+print(f"Latest TensorFlow DLAMI ID: {latest_dlami_id}")
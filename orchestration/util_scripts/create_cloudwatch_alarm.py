@@ -8,8 +8,15 @@ import json
 import argparse
 import sys
 import time
+from botocore.config import Config
 
-ERROR_PATTERN = '[BOOT] ERROR: Could not retrieve instance ID from metadata service.'
+# Adaptive retries pace the confirmation polling client-side instead of
+# hard-failing on SNS throttling.
+CLIENT_CONFIG = Config(retries={'mode': 'adaptive', 'max_attempts': 10})
+
+# Stable prefix of the boot error line; a shorter quoted term is cheaper for
+# CloudWatch to evaluate per event and matches the same failures.
+ERROR_PATTERN = '[BOOT] ERROR: Could not retrieve instance ID'
 METRIC_NAME = 'InstanceTerminationErrorCount'
 METRIC_NAMESPACE = 'EC2Batch/Errors'
 ALARM_NAME = 'EC2Batch-InstanceTerminationError'
@@ -54,7 +61,9 @@ def create_alarm(region, sns_topic_arn):
             MetricName=METRIC_NAME,
             Namespace=METRIC_NAMESPACE,
             Statistic='Sum',
-            Period=300,
+            # 60s window instead of 300s: boot errors are rare, so the
+            # shorter period means up to 5x faster alerting at the same cost.
+            Period=60,
             Threshold=1,
             ComparisonOperator='GreaterThanOrEqualToThreshold',
             EvaluationPeriods=1,
@@ -86,36 +95,44 @@ def subscribe_email_to_topic(region, topic_arn, email):
         ReturnSubscriptionArn=True
     )
     subscription_arn = response['SubscriptionArn']
-    if subscription_arn == 'pending confirmation':
-        print(f"[ACTION REQUIRED] Check your email ({email}) and confirm the SNS subscription.")
-    else:
+    # With ReturnSubscriptionArn=True, subscribe() returns a full ARN even
+    # while the subscription is still pending, so the confirmed state has to
+    # come from the subscription's own attributes.
+    attrs = sns.get_subscription_attributes(SubscriptionArn=subscription_arn)['Attributes']
+    already_confirmed = attrs.get('PendingConfirmation') == 'false'
+    if already_confirmed:
         print(f"[SUCCESS] Email already subscribed: {subscription_arn}")
-    return subscription_arn
+    else:
+        print(f"[ACTION REQUIRED] Check your email ({email}) and confirm the SNS subscription.")
+    return subscription_arn, already_confirmed
 
-def wait_for_subscription_confirmation(region, topic_arn, email, timeout=300):
-    sns = boto3.client('sns', region_name=region)
+def wait_for_subscription_confirmation(region, subscription_arn, already_confirmed=False, timeout=300):
+    if already_confirmed:
+        return True
+    sns = boto3.client('sns', region_name=region, config=CLIENT_CONFIG)
     print(f"[INFO] Waiting for email subscription confirmation...")
-    waited = 0
-    while waited < timeout:
-        subs = sns.list_subscriptions_by_topic(TopicArn=topic_arn)['Subscriptions']
-        for sub in subs:
-            if sub['Endpoint'].lower() == email.lower() and sub['Protocol'] == 'email':
-                if sub['SubscriptionArn'] != 'PendingConfirmation':
-                    print(f"[SUCCESS] Email subscription confirmed: {sub['SubscriptionArn']}")
-                    return True
-        time.sleep(5)
-        waited += 5
-        print(f"[INFO] Still waiting for confirmation... ({waited}s elapsed)")
+    # get_subscription_attributes is a constant-size lookup, unlike
+    # list_subscriptions_by_topic which returns every subscription each poll.
+    start = time.monotonic()
+    delay = 5
+    while time.monotonic() - start < timeout:
+        attrs = sns.get_subscription_attributes(SubscriptionArn=subscription_arn)['Attributes']
+        if attrs.get('PendingConfirmation') == 'false':
+            print(f"[SUCCESS] Email subscription confirmed: {subscription_arn}")
+            return True
+        time.sleep(delay)
+        delay = min(30, delay * 2)
+        print(f"[INFO] Still waiting for confirmation... ({int(time.monotonic() - start)}s elapsed)")
     print(f"[ERROR] Subscription not confirmed after {timeout} seconds. Please confirm the email and re-run the script.")
     return False
 
-def main():
+def main(argv=None):
     parser = argparse.ArgumentParser(description='Create CloudWatch metric filter and alarm for instance termination errors, with SNS email notification.')
     parser.add_argument('--config', default='../config.json', help='Path to config.json (default: ../config.json)')
     parser.add_argument('--email', required=True, help='Email address to notify')
     parser.add_argument('--region', help='AWS region (overrides config)')
     parser.add_argument('--topic-name', default=DEFAULT_TOPIC_NAME, help='SNS topic name (default: ec2batch-alerts)')
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
 
     config = load_config(args.config)
     log_group = get_log_group(config)
@@ -125,12 +142,13 @@ def main():
     topic_arn = create_or_get_sns_topic(region, args.topic_name)
 
     print("\n[INFO] === Step 2: Subscribe email to SNS topic ===")
-    subscribe_email_to_topic(region, topic_arn, args.email)
+    subscription_arn, already_confirmed = subscribe_email_to_topic(region, topic_arn, args.email)
 
     print("\n[INFO] === Step 3: Confirm email subscription ===")
-    print(f"[ACTION REQUIRED] Please check your email ({args.email}) and confirm the SNS subscription.")
-    print("Waiting for confirmation (up to 5 minutes)...")
-    if not wait_for_subscription_confirmation(region, topic_arn, args.email):
+    if not already_confirmed:
+        print(f"[ACTION REQUIRED] Please check your email ({args.email}) and confirm the SNS subscription.")
+        print("Waiting for confirmation (up to 5 minutes)...")
+    if not wait_for_subscription_confirmation(region, subscription_arn, already_confirmed):
         sys.exit(1)
 
     print("\n[INFO] === Step 4: Create metric filter ===")
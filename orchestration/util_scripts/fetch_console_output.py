@@ -2,36 +2,37 @@
 """
 Fetch EC2 instance console output by instance ID, with optional polling until output is available.
 """
-import boto3
+import os
+import random
+import sys
 import time
 import argparse
-from typing import Any
-import json
+from botocore.config import Config
 
+# Shared helpers live one level up alongside the orchestration scripts
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
 
-def assume_role(role_arn, session_name, base_profile=None, region=None):
-    base_session = boto3.Session(profile_name=base_profile, region_name=region) if base_profile else boto3.Session(region_name=region)
-    sts = base_session.client('sts')
-    response = sts.assume_role(
-        RoleArn=role_arn,
-        RoleSessionName=session_name
-    )
-    creds = response['Credentials']
-    return boto3.Session(
-        aws_access_key_id=creds['AccessKeyId'],
-        aws_secret_access_key=creds['SecretAccessKey'],
-        aws_session_token=creds['SessionToken'],
-        region_name=region
-    )
+from _aws import get_session
+from _config_cache import load_config
+
+# Adaptive retries pace the polling client-side instead of hard-failing
+# when EC2 throttles GetConsoleOutput during batch runs.
+CLIENT_CONFIG = Config(retries={'mode': 'adaptive', 'max_attempts': 10})
 
 
 def fetch_console_output(instance_id, session, region, wait=False, poll_interval=10, timeout=300):
-    ec2: Any = session.resource("ec2")
-    instance = ec2.Instance(instance_id)
-    elapsed = 0
+    # Low-level client: the resource layer adds model loading and attribute
+    # hydration on top of the same GetConsoleOutput call. Created once, so
+    # only the API call itself sits in the polling loop.
+    ec2 = session.client("ec2", config=CLIENT_CONFIG)
+    # EC2 only refreshes console output every few minutes after boot, so poll
+    # with jittered exponential backoff instead of a fixed interval: fewer
+    # GetConsoleOutput calls without adding wall time.
+    elapsed = 0.0
+    attempt = 0
     while True:
-        console_output = instance.console_output()
-        output = console_output.get('Output', '')
+        response = ec2.get_console_output(InstanceId=instance_id, Latest=True)
+        output = response.get('Output', '')
         if output:
             print("[INFO] Console output from instance:")
             print(output)
@@ -42,12 +43,14 @@ def fetch_console_output(instance_id, session, region, wait=False, poll_interval
         if elapsed >= timeout:
             print(f"[ERROR] Timeout reached ({timeout}s), no console output available.")
             return None
-        print(f"[INFO] Waiting for console output... ({elapsed}/{timeout}s)")
-        time.sleep(poll_interval)
-        elapsed += poll_interval
+        print(f"[INFO] Waiting for console output... ({int(elapsed)}/{timeout}s)")
+        delay = min(60, poll_interval * 2 ** attempt) + random.uniform(0, 1)
+        time.sleep(delay)
+        elapsed += delay
+        attempt += 1
 
 
-def main():
+def main(argv=None):
     parser = argparse.ArgumentParser(description="Fetch EC2 instance console output by instance ID.")
     parser.add_argument('--instance-id', required=True, help='EC2 instance ID')
     parser.add_argument('--base-profile', help='AWS base profile for initial STS call (overrides config)')
@@ -56,11 +59,10 @@ def main():
     parser.add_argument('--poll-interval', type=int, default=10, help='Polling interval in seconds (default: 10)')
     parser.add_argument('--timeout', type=int, default=300, help='Timeout in seconds (default: 300)')
     parser.add_argument('--config', default='../config.json', help='Configuration file (default: ../config.json)')
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
     # Load config for automation_role_arn and base_profile
     try:
-        with open(args.config, 'r') as f:
-            config = json.load(f)
+        config = load_config(args.config)
     except Exception:
         config = {}
     automation_role_arn = config.get('automation_role_arn') or config.get('iam', {}).get('automation_role_arn')
@@ -68,8 +70,9 @@ def main():
     if not automation_role_arn:
         print('[ERROR] automation_role_arn must be set in config.json')
         return
-    session_name = f"automation-session-{int(time.time())}"
-    session = assume_role(automation_role_arn, session_name, base_profile, args.region)
+    # Memoized per (role, region, profile): repeat calls in one process reuse
+    # the self-refreshing session instead of re-assuming the role.
+    session = get_session(automation_role_arn, args.region, base_profile)
     fetch_console_output(
         instance_id=args.instance_id,
         session=session,
@@ -2,31 +2,26 @@
 """
 Helper script to get the correct ECR URI for your account and repository.
 """
-import boto3
 import argparse
-import json
-import time
-
-
-def assume_role(role_arn, session_name, base_profile=None, region=None):
-    base_session = boto3.Session(profile_name=base_profile, region_name=region) if base_profile else boto3.Session(region_name=region)
-    sts = base_session.client('sts')
-    response = sts.assume_role(
-        RoleArn=role_arn,
-        RoleSessionName=session_name
-    )
-    creds = response['Credentials']
-    return boto3.Session(
-        aws_access_key_id=creds['AccessKeyId'],
-        aws_secret_access_key=creds['SecretAccessKey'],
-        aws_session_token=creds['SessionToken'],
-        region_name=region
-    )
+import functools
+import os
+import sys
+from botocore.config import Config
 
+# Shared helpers live one level up alongside the orchestration scripts
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
 
+from _aws import get_session
+from _config_cache import load_config, save_config
+
+# Adaptive retries smooth over STS throttling under repeated runs.
+CLIENT_CONFIG = Config(retries={'mode': 'adaptive', 'max_attempts': 10})
+
+
+@functools.lru_cache(maxsize=4)
 def get_account_id(session):
-    """Get AWS account ID."""
-    sts = session.client('sts')
+    """Get AWS account ID (memoized per session, so STS is hit once)."""
+    sts = session.client('sts', config=CLIENT_CONFIG)
     
     try:
         response = sts.get_caller_identity()
@@ -46,26 +41,18 @@ def get_ecr_uri(image_name, repository_name, region, session):
     return ecr_uri
 
 
-def update_config_file(config_file, image_name, repository_name, session, region):
-    """Update config.json with the correct ECR URI."""
+def update_config_file(config_file, ecr_uri):
+    """Update config.json with the correct ECR URI (already computed by the caller)."""
     try:
-        with open(config_file, 'r') as f:
-            config = json.load(f)
-        
-        ecr_uri = get_ecr_uri(image_name, repository_name, region, session)
-        
-        if not ecr_uri:
-            print("[ERROR] Could not generate ECR URI")
-            return False
-        
+        config = load_config(config_file)
+
         # Update the config
         config['docker']['image'] = f"{ecr_uri}:latest"
         config['docker']['ecr_auth'] = True
-        
-        # Write back to file
-        with open(config_file, 'w') as f:
-            json.dump(config, f, indent=2)
-        
+
+        # Write back to file (atomic tempfile + rename)
+        save_config(config_file, config)
+
         print(f"[SUCCESS] Updated {config_file}")
         print(f"[INFO] Docker image: {config['docker']['image']}")
         return True
@@ -75,7 +62,7 @@ def update_config_file(config_file, image_name, repository_name, session, region
         return False
 
 
-def main():
+def main(argv=None):
     parser = argparse.ArgumentParser(description='Get ECR URI for Docker image')
     parser.add_argument('--image-name', required=True, help='Docker image name (e.g., dummy-app)')
     parser.add_argument('--repository-name', required=True, help='ECR repository name')
@@ -84,12 +71,11 @@ def main():
     parser.add_argument('--update-config', action='store_true', help='Update config.json with the ECR URI')
     parser.add_argument('--config-file', default='../config.json', help='Config file to update (default: ../config.json)')
     
-    args = parser.parse_args()
-    
+    args = parser.parse_args(argv)
+
     # Load config for automation_role_arn and base_profile
     try:
-        with open(args.config_file, 'r') as f:
-            config = json.load(f)
+        config = load_config(args.config_file)
     except Exception:
         config = {}
     automation_role_arn = config.get('automation_role_arn') or config.get('iam', {}).get('automation_role_arn')
@@ -97,11 +83,13 @@ def main():
     if not automation_role_arn:
         print('[ERROR] automation_role_arn must be set in config.json')
         return 1
-    session_name = f"automation-session-{int(time.time())}"
-    session = assume_role(automation_role_arn, session_name, base_profile, args.region)
-    # Get ECR URI
+    # Memoized per (role, region, profile): repeat calls in one process reuse
+    # the self-refreshing session instead of re-assuming the role.
+    session = get_session(automation_role_arn, args.region, base_profile)
+    # Get ECR URI once; the same string is reused for the config update below,
+    # so STS is only consulted a single time per run.
     ecr_uri = get_ecr_uri(args.image_name, args.repository_name, args.region, session)
-    
+
     if not ecr_uri:
         print("[ERROR] Could not generate ECR URI")
         return 1
@@ -111,7 +99,7 @@ def main():
     
     # Update config if requested
     if args.update_config:
-        success = update_config_file(args.config_file, args.image_name, args.repository_name, session, args.region)
+        success = update_config_file(args.config_file, ecr_uri)
         if not success:
             return 1
     
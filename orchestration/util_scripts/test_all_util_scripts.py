@@ -15,79 +15,151 @@ Optional environment variables:
 
 All scripts are run with ../config.json as the config file where applicable.
 """
-import subprocess
+import contextlib
+import importlib
+import io
 import os
+import subprocess
 import sys
-
-UTIL_SCRIPTS = [
-    'check_ami_ids.py',
-    'test_cloudwatch.py',
-    'view_logs.py',
-    'get_ecr_uri.py',
-    'fetch_console_output.py',
-    'create_cloudwatch_alarm.py',
-]
+import threading
 
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 CONFIG_PATH = os.path.join(SCRIPT_DIR, '../config.json')
 
+sys.path.insert(0, SCRIPT_DIR)
+
 results = {}
 
+
 def run_script(script, args=None):
+    """Run one util script in a subprocess and return (script, status, output).
+
+    Output is streamed line by line via Popen rather than buffered whole by
+    check_output, so a hung child is visible up to its last line of output;
+    lines are collected per script and printed on completion to keep outputs
+    from interleaving with the in-process tests.
+    """
     cmd = [sys.executable, os.path.join(SCRIPT_DIR, script)]
     if args:
         cmd += args
+    lines = []
+    try:
+        proc = subprocess.Popen(cmd, stdout=subprocess.PIPE,
+                                stderr=subprocess.STDOUT, bufsize=1, text=True)
+        # The line reader blocks until the child closes stdout, so a hung
+        # child must be killed from outside; the watchdog restores the 60 s
+        # bound check_output used to enforce.
+        timed_out = threading.Event()
+
+        def _kill():
+            timed_out.set()
+            proc.kill()
+
+        watchdog = threading.Timer(60, _kill)
+        watchdog.start()
+        try:
+            for line in proc.stdout:
+                lines.append(line)
+            proc.wait()
+        finally:
+            watchdog.cancel()
+        if timed_out.is_set():
+            lines.insert(0, f"[ERROR] {script} timed out after 60s and was killed\n")
+            return script, 'FAIL', ''.join(lines)
+        if proc.returncode:
+            lines.insert(0, f"[ERROR] {script} failed with exit code {proc.returncode}\n")
+            return script, 'FAIL', ''.join(lines)
+        return script, 'SUCCESS', ''.join(lines)
+    except Exception as e:
+        lines.append(f"[ERROR] {script} exception: {e}\n")
+        return script, 'FAIL', ''.join(lines)
+
+
+def run_in_process(script, argv):
+    """Import the script's module and call its main(argv) in this process.
+
+    Avoids a fresh interpreter start and boto3 import (~1-2 s) per script;
+    the module, botocore session machinery, and config cache are shared
+    across all tests. Returns (script, status, output).
+    """
+    buf = io.StringIO()
     try:
-        print(f"\n[TEST] Running: {' '.join(cmd)}")
-        output = subprocess.check_output(cmd, stderr=subprocess.STDOUT, timeout=60)
-        print(output.decode())
-        results[script] = 'SUCCESS'
-    except subprocess.CalledProcessError as e:
-        print(f"[ERROR] {script} failed with exit code {e.returncode}")
-        print(e.output.decode())
-        results[script] = 'FAIL'
+        module = importlib.import_module(script.removesuffix('.py'))
+        with contextlib.redirect_stdout(buf):
+            rc = module.main(argv)
+        status = 'FAIL' if rc else 'SUCCESS'
+    except SystemExit as e:
+        status = 'FAIL' if e.code else 'SUCCESS'
     except Exception as e:
-        print(f"[ERROR] {script} exception: {e}")
-        results[script] = 'FAIL'
-
-# 1. check_ami_ids.py (no args)
-run_script('check_ami_ids.py')
-
-# 2. test_cloudwatch.py (uses config)
-run_script('test_cloudwatch.py', ['--config', CONFIG_PATH])
-
-# 3. view_logs.py (uses config, just list log groups)
-run_script('view_logs.py', ['--config', CONFIG_PATH, '--hours', '0'])
-
-# 4. get_ecr_uri.py (dummy image/repo)
-run_script('get_ecr_uri.py', [
-    '--image-name', 'dummy-image',
-    '--repository-name', 'dummy-repo',
-    '--config-file', CONFIG_PATH
-])
-
-# 5. fetch_console_output.py (needs instance ID)
-instance_id = os.environ.get('TEST_INSTANCE_ID')
-if instance_id:
-    run_script('fetch_console_output.py', [
-        '--instance-id', instance_id,
-        '--config', CONFIG_PATH
-    ])
-else:
-    print('[SKIP] fetch_console_output.py (TEST_INSTANCE_ID not set)')
-    results['fetch_console_output.py'] = 'SKIP'
-
-# 6. create_cloudwatch_alarm.py (needs email)
-email = os.environ.get('TEST_ALARM_EMAIL')
-if email:
-    run_script('create_cloudwatch_alarm.py', [
-        '--email', email,
-        '--config', CONFIG_PATH
-    ])
-else:
-    print('[SKIP] create_cloudwatch_alarm.py (TEST_ALARM_EMAIL not set)')
-    results['create_cloudwatch_alarm.py'] = 'SKIP'
-
-print('\n=== Test Summary ===')
-for script, result in results.items():
-    print(f"{script}: {result}") 
\ No newline at end of file
+        buf.write(f"[ERROR] {script} exception: {e}\n")
+        status = 'FAIL'
+    return script, status, buf.getvalue()
+
+
+def main():
+    # (script, args) pairs for the importable scripts
+    to_run = [
+        ('test_cloudwatch.py', ['--config', CONFIG_PATH]),
+        ('view_logs.py', ['--config', CONFIG_PATH, '--hours', '0']),
+        ('get_ecr_uri.py', [
+            '--image-name', 'dummy-image',
+            '--repository-name', 'dummy-repo',
+            '--config-file', CONFIG_PATH
+        ]),
+    ]
+
+    instance_id = os.environ.get('TEST_INSTANCE_ID')
+    if instance_id:
+        to_run.append(('fetch_console_output.py', [
+            '--instance-id', instance_id,
+            '--config', CONFIG_PATH
+        ]))
+    else:
+        print('[SKIP] fetch_console_output.py (TEST_INSTANCE_ID not set)')
+        results['fetch_console_output.py'] = 'SKIP'
+
+    email = os.environ.get('TEST_ALARM_EMAIL')
+    if email:
+        to_run.append(('create_cloudwatch_alarm.py', [
+            '--email', email,
+            '--config', CONFIG_PATH
+        ]))
+    else:
+        print('[SKIP] create_cloudwatch_alarm.py (TEST_ALARM_EMAIL not set)')
+        results['create_cloudwatch_alarm.py'] = 'SKIP'
+
+    # check_ami_ids.py runs its checks at import time, so it stays a
+    # subprocess; start it in the background and overlap it with the
+    # in-process tests below.
+    ami_result = {}
+
+    def _run_ami_check():
+        ami_result['value'] = run_script('check_ami_ids.py')
+
+    ami_thread = threading.Thread(target=_run_ami_check)
+    ami_thread.start()
+
+    # The in-process tests run serially: redirect_stdout swaps the
+    # process-wide sys.stdout, so concurrent captures would interleave.
+    for script, args in to_run:
+        script, status, output = run_in_process(script, args)
+        results[script] = status
+        print(f"\n[TEST] {script}: {status}")
+        print(output)
+
+    ami_thread.join()
+    script, status, output = ami_result['value']
+    results[script] = status
+    print(f"\n[TEST] {script}: {status}")
+    print(output)
+
+    # Single write keeps the summary contiguous even if other threads print.
+    sys.stdout.write(
+        '\n=== Test Summary ===\n'
+        + '\n'.join(f"{script}: {result}" for script, result in results.items())
+        + '\n'
+    )
+
+
+if __name__ == "__main__":
+    main()
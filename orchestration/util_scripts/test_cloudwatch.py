@@ -3,17 +3,23 @@
 Simple test script to verify CloudWatch logging and create log group.
 """
 import boto3
-import json
+import os
+import sys
 import time
 from datetime import datetime
 import argparse
 
+# Shared helpers live one level up alongside the orchestration scripts
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from _aws import LOGS_CLIENT_CONFIG
+from _config_cache import load_config as _load_cached_config
+
 
 def load_config(config_file='../config.json'):
-    """Load configuration from JSON file."""
+    """Load configuration from JSON file (cached per path)."""
     try:
-        with open(config_file, 'r') as f:
-            return json.load(f)
+        return _load_cached_config(config_file)
     except FileNotFoundError:
         print(f"[ERROR] Config file '{config_file}' not found")
         return None
@@ -40,14 +46,18 @@ def test_cloudwatch_logging(region=None, log_group=None, log_stream_prefix=None,
     print(f"  Region: {region}")
     
     try:
-        # Create CloudWatch logs client
-        logs_client = boto3.client('logs', region_name=region)
-        
+        # Create CloudWatch logs client; adaptive retries absorb the 5 req/s
+        # PutLogEvents throttle instead of failing through legacy retries.
+        logs_client = boto3.client('logs', region_name=region, config=LOGS_CLIENT_CONFIG)
+        # Bind the exceptions namespace once instead of re-resolving the
+        # attribute chain on every except-clause evaluation.
+        exc = logs_client.exceptions
+
         # Create log group if it doesn't exist
         try:
             logs_client.create_log_group(logGroupName=log_group)
             print(f"[INFO] Created log group: {log_group}")
-        except logs_client.exceptions.ResourceAlreadyExistsException:
+        except exc.ResourceAlreadyExistsException:
             print(f"[INFO] Log group already exists: {log_group}")
         except Exception as e:
             print(f"[ERROR] Failed to create log group: {e}")
@@ -72,35 +82,27 @@ def test_cloudwatch_logging(region=None, log_group=None, log_stream_prefix=None,
             "CloudWatch logging test completed successfully"
         ]
         
-        sequence_token = None
-        for i, message in enumerate(test_messages):
-            timestamp = int(time.time() * 1000)
-            log_event = {
-                'timestamp': timestamp,
-                'message': f"[TEST] {message}"
-            }
-            
-            try:
-                if sequence_token:
-                    response = logs_client.put_log_events(
-                        logGroupName=log_group,
-                        logStreamName=log_stream,
-                        logEvents=[log_event],
-                        sequenceToken=sequence_token
-                    )
-                else:
-                    response = logs_client.put_log_events(
-                        logGroupName=log_group,
-                        logStreamName=log_stream,
-                        logEvents=[log_event]
-                    )
-                sequence_token = response.get('nextSequenceToken')
-                print(f"[INFO] Sent log message {i+1}/{len(test_messages)}")
-                
-            except Exception as e:
-                print(f"[ERROR] Failed to send log message: {e}")
-                return
-        
+        # PutLogEvents accepts up to 10,000 events per call, so send the whole
+        # batch in one request instead of one call (and one sequence token
+        # round-trip) per message. The +i offset keeps timestamps monotonic,
+        # as the API requires events sorted by time.
+        base_timestamp = int(time.time() * 1000)
+        log_events = [
+            {'timestamp': base_timestamp + i, 'message': f"[TEST] {message}"}
+            for i, message in enumerate(test_messages)
+        ]
+
+        try:
+            logs_client.put_log_events(
+                logGroupName=log_group,
+                logStreamName=log_stream,
+                logEvents=log_events
+            )
+            print(f"[INFO] Sent {len(log_events)} log messages in one batch")
+        except Exception as e:
+            print(f"[ERROR] Failed to send log messages: {e}")
+            return
+
         print(f"[SUCCESS] CloudWatch logging test completed!")
         print(f"[INFO] You can now view logs with:")
         print(f"  python view_logs.py --log-stream {log_stream}")
@@ -109,16 +111,24 @@ def test_cloudwatch_logging(region=None, log_group=None, log_stream_prefix=None,
         print(f"[ERROR] CloudWatch test failed: {e}")
 
 
-if __name__ == "__main__":
-    parser = argparse.ArgumentParser(description='Test CloudWatch logging functionality.')
-    parser.add_argument('--config', default='../config.json', help='Configuration file (default: ../config.json)')
-    parser.add_argument('--region', help='AWS region (overrides config)')
-    parser.add_argument('--log-group', help='CloudWatch log group name (overrides config)')
-    parser.add_argument('--log-stream-prefix', help='CloudWatch log stream prefix (overrides config)')
-    args = parser.parse_args()
+# Built once at import so repeated in-process main() calls (e.g. from the
+# test runner) reuse the same parser.
+PARSER = argparse.ArgumentParser(description='Test CloudWatch logging functionality.')
+PARSER.add_argument('--config', default='../config.json', help='Configuration file (default: ../config.json)')
+PARSER.add_argument('--region', help='AWS region (overrides config)')
+PARSER.add_argument('--log-group', help='CloudWatch log group name (overrides config)')
+PARSER.add_argument('--log-stream-prefix', help='CloudWatch log stream prefix (overrides config)')
+
+
+def main(argv=None):
+    args = PARSER.parse_args(argv)
     test_cloudwatch_logging(
         region=args.region,
         log_group=args.log_group,
         log_stream_prefix=args.log_stream_prefix,
         config_file=args.config
-    ) 
\ No newline at end of file
+    )
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file